@@ -25,18 +25,27 @@
 
 
 import base64
+import bisect
 import collections
+import concurrent.futures
 import copy
 import datetime
-import distutils.dir_util
+import functools
 import glob
 import hashlib
-import htmlmin
+import html
+import io
+import itertools
 import jinja2
 import json
+import minify_html
+import numpy
+import operator
 import os
+import pickle
 import PIL.Image
-import PIL.ImageChops
+import pillow_avif
+import pypdfium2
 import re
 import rcssmin
 import shutil
@@ -46,21 +55,65 @@ import sys
 
 import orcid
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def fread(filename):
-    """Read file and close the file."""
+
+@functools.lru_cache(maxsize=None)
+def _fread_cached(filename, mtime):
     with open(filename, 'r') as f:
         return f.read()
 
 
+def fread(filename):
+    """Read file and close the file, reusing the cached content for files
+    that have not changed since the last read."""
+    return _fread_cached(filename, os.stat(filename).st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_json_cached(filename, mtime):
+    with open(filename, 'rb') as f:
+        data = f.read()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_json(filename):
+    """Load a JSON metadata file, cached per modification time. Callers get
+    their own copy since several of them annotate the loaded entries."""
+    return copy.deepcopy(_load_json_cached(filename, os.stat(filename).st_mtime_ns))
+
+
+# Output directories that are known to exist, so that writing many files
+# into the same directory costs one stat instead of one per file.
+_known_dirs = set()
+
+
+def ensure_dir(dirname):
+    """Create a directory if needed, remembering known-existing ones."""
+    if dirname in _known_dirs:
+        return
+    if not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    _known_dirs.add(dirname)
+
+
 def fwrite(filename, text):
-    """Write content to file and close the file."""
-    basedir = os.path.dirname(filename)
-    if not os.path.isdir(basedir):
-        os.makedirs(basedir)
+    """Write content to file and close the file.
 
-    with open(filename, 'w') as f:
+    The content goes to a temporary file first and is renamed into
+    place. Build files can be hardlinked into the deployed tree, and
+    opening those with 'w' would truncate the shared inode and mutate
+    the live site mid-build; the rename replaces the link instead."""
+    ensure_dir(os.path.dirname(filename))
+
+    with open(filename + '.tmp', 'w') as f:
         f.write(text)
+    os.replace(filename + '.tmp', filename)
 
 
 def log(msg, *args):
@@ -68,41 +121,57 @@ def log(msg, *args):
     sys.stderr.write(msg.format(*args) + '\n')
 
 
+_header_re = re.compile(r'\s*<!--\s*(.+?)\s*:\s+(.+?)\s*-->\s*')
+_date_slug_re = re.compile(r'^(?:(\d\d\d\d-\d\d-\d\d)-)?(.+)$')
+
+
 def read_headers(text):
     """Parse headers in text and yield (key, value, end-index) tuples."""
-    for match in re.finditer(r'\s*<!--\s*(.+?)\s*:\s+(.+?)\s*-->\s*|.+', text):
-        if not match.group(1):
+    pos = 0
+    while pos < len(text):
+        match = _header_re.match(text, pos)
+        if not match:
             break
         yield match.group(1), match.group(2), match.end()
+        pos = match.end()
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_ymd(date):
+    return datetime.datetime.strptime(date, '%Y-%m-%d')
+
+
+# Ordinal suffixes indexed directly by day of month (index 0 is unused).
+_ordinal_suffixes = ('th', 'st', 'nd', 'rd') + ('th',) * 17 + ('st', 'nd', 'rd') + ('th',) * 7 + ('st',)
 
 
 def rfc_2822_format(date):
     if not isinstance(date, datetime.datetime):
-        date = datetime.datetime.strptime(date, '%Y-%m-%d')
+        date = _parse_ymd(date)
     return date.strftime('%a, %d %b %Y %H:%M:%S +0000')
 
 
+@functools.lru_cache(maxsize=512)
 def pretty_format(date):
     if not isinstance(date, datetime.datetime):
-        date = datetime.datetime.strptime(date, '%Y-%m-%d')
-    ordinal_suffix = 'th'
-    if date.day in [1, 21, 31]:
-        ordinal_suffix = 'st'
-    elif date.day in [2, 22]:
-        ordinal_suffix = 'nd'
-    elif date.day in [3, 23]:
-        ordinal_suffix = 'rd'
+        date = _parse_ymd(date)
+    ordinal_suffix = _ordinal_suffixes[date.day]
     return date.strftime('%b %-d' + ordinal_suffix + ', %Y')
 
 
-def read_content(filename):
-    """Read content and metadata from file into a dictionary."""
+# Markdown parser, created on first use so that its setup cost is only
+# paid once and only when Markdown content exists.
+_markdown_parser = None
+
+
+@functools.lru_cache(maxsize=None)
+def _read_content_cached(filename, mtime):
     # Read file content.
     text = fread(filename)
 
     # Read metadata and save it in a dictionary.
     date_slug = os.path.basename(filename).split('.')[0]
-    match = re.search(r'^(?:(\d\d\d\d-\d\d-\d\d)-)?(.+)$', date_slug)
+    match = _date_slug_re.search(date_slug)
     content = {
         'date': match.group(1) or '1970-01-01',
         'slug': match.group(2),
@@ -121,8 +190,11 @@ def read_content(filename):
         try:
             if _test == 'ImportError':
                 raise ImportError('Error forced by test')
-            import commonmark
-            text = commonmark.commonmark(text)
+            import markdown_it
+            global _markdown_parser
+            if _markdown_parser is None:
+                _markdown_parser = markdown_it.MarkdownIt('commonmark')
+            text = _markdown_parser.render(text)
         except ImportError as e:
             log('WARNING: Cannot render Markdown in {}: {}', filename, str(e))
 
@@ -135,14 +207,130 @@ def read_content(filename):
     return content
 
 
+def read_content(filename):
+    """Read content and metadata from file into a dictionary."""
+    # Callers mutate the result, so they get their own copy. Parsing (in
+    # particular Markdown conversion) still only happens once per file.
+    return copy.deepcopy(_read_content_cached(filename, os.stat(filename).st_mtime_ns))
+
+
+@functools.lru_cache(maxsize=None)
+def make_template_env(data_root):
+    """Build a Jinja environment for a build run, one per data root and
+    process. Templates never change during a build, so the stat-per-render
+    auto reload is off, the template cache is unbounded, and compiled
+    templates persist across builds."""
+    templates_path = os.path.join(data_root, 'templates')
+    bytecode_dir = os.path.join(data_root, 'cache', 'jinja')
+    if not os.path.isdir(bytecode_dir):
+        os.makedirs(bytecode_dir)
+    return jinja2.Environment(
+        loader=jinja2.FileSystemLoader(templates_path),
+        auto_reload=False,
+        cache_size=-1,
+        bytecode_cache=jinja2.FileSystemBytecodeCache(directory=bytecode_dir))
+
+
+_placeholder_re = re.compile(r'{{\s*([^}\s]+)\s*}}')
+
+
+class _PlaceholderParams(dict):
+    # Unresolved placeholders stay in the output verbatim, matching the
+    # regex-based substitution this replaced.
+    def __missing__(self, key):
+        return '{{ ' + key + ' }}'
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_placeholders(template):
+    return _placeholder_re.sub(r'{\1}', template)
+
+
 def render(template, **params):
-    """Replace placeholders in template with values from params."""
-    return re.sub(r'{{\s*([^}\s]+)\s*}}',
-                  lambda match: str(params.get(match.group(1), match.group(0))),
-                  template)
+    """Replace placeholders in template with values from params. The
+    template is translated to a format string once per unique pattern, so
+    repeated renders skip the regex engine entirely."""
+    return _compile_placeholders(template).format_map(_PlaceholderParams(params))
+
+
+def run_optimizer_cached(cmd, source, target, params):
+    """Run an external optimizer tool, backed by a content-addressed cache.
+
+    The cache key covers the source bytes and the tool command line, so it
+    stays valid across fresh checkouts and machines where mtimes change
+    but the content does not."""
+    cache_dir = os.path.join(params['data_root'], 'cache', 'content')
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    with open(source, 'rb') as f:
+        source_bytes = f.read()
+    # The source and target paths differ between build targets without
+    # affecting the tool output, so they stay out of the key.
+    key_cmd = ' '.join(part for part in cmd if part not in (source, target))
+    key = hashlib.sha256(source_bytes + b'|' + key_cmd.encode('utf-8')).hexdigest()
+    cache_path = os.path.join(cache_dir, key)
+    # An existing target may be hardlinked into the deployed tree, so it
+    # is unlinked up front; both the cache copy and the tool would
+    # otherwise rewrite the shared inode in place (see fwrite).
+    try:
+        os.remove(target)
+    except OSError:
+        pass
+    if os.path.isfile(cache_path):
+        shutil.copy2(cache_path, target)
+    else:
+        subprocess.run(cmd)
+        if os.path.isfile(target):
+            shutil.copy2(target, cache_path)
+
+
+_build_permissions = stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP | stat.S_IROTH
+
+# Minification jobs that still have to finish before the build output can
+# be used; see finish_build_jobs().
+_deferred_build_jobs = []
+
+
+def _closure_compile_job(cmd, source, target, params):
+    run_optimizer_cached(cmd, source, target, params)
+    shutil.copystat(source, target)
+    os.chmod(target, _build_permissions)
+
 
+def finish_build_jobs():
+    """Wait for all deferred minification jobs to complete."""
+    global _deferred_build_jobs
+    for job in _deferred_build_jobs:
+        job.result()
+    _deferred_build_jobs = []
 
-def optimize_for_build(source, target):
+
+def copy_to_build(source, target):
+    """Copy a file into the build directory, preferring a hardlink.
+
+    A hardlink is a single inode operation instead of a byte-for-byte
+    copy, but the build chmods its files afterwards, and on a shared
+    inode that would rewrite the permission bits of the original under
+    static/. Only sources whose mode already matches are linked; the
+    rest, and targets on a different filesystem, get a real copy."""
+    try:
+        os.remove(target)
+    except OSError:
+        pass
+    if stat.S_IMODE(os.stat(source).st_mode) == _build_permissions:
+        try:
+            os.link(source, target)
+            return
+        except OSError:
+            pass
+    shutil.copy2(source, target)
+
+
+def optimize_for_build(source, target, params):
+    """Optimize a file into the build directory.
+
+    Returns True when the work has been deferred to a background job; the
+    target file may not exist until finish_build_jobs() has run."""
     if target.endswith('.js'):
         with open(source, 'r') as f:
             start = f.read(13)
@@ -150,58 +338,99 @@ def optimize_for_build(source, target):
             if start == '\'use strict\';':
                 jar_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'closure-compiler-v*.jar')
                 jar_path = glob.glob(jar_path)[0]
-                subprocess.run(['java', '-jar', jar_path, '--compilation_level', 'ADVANCED', '--js', source,
-                                '--js_output_file', target, '--language_in', 'ECMASCRIPT_2015', '--language_out', 'ECMASCRIPT_2015',
-                                '--strict_mode_input', '--formatting', 'SINGLE_QUOTES'])
-                shutil.copystat(source, target)
+                cmd = ['java', '-jar', jar_path, '--compilation_level', 'ADVANCED', '--js', source,
+                       '--js_output_file', target, '--language_in', 'ECMASCRIPT_2015', '--language_out', 'ECMASCRIPT_2015',
+                       '--strict_mode_input', '--formatting', 'SINGLE_QUOTES']
+                # Each Closure Compiler run pays a full JVM start and the
+                # plain CLI distribution has no persistent server mode, so
+                # the runs overlap on the shared executor instead of
+                # serializing their startup costs.
+                _deferred_build_jobs.append(get_tool_executor().submit(_closure_compile_job, cmd, source, target, params))
+                return True
             else:
-                shutil.copy2(source, target)
+                copy_to_build(source, target)
     elif target.endswith('.svg'):
-        subprocess.run(['svgo', source, '-o', target])
+        run_optimizer_cached(['svgo', source, '-o', target], source, target, params)
         shutil.copystat(source, target)
     else:
-        shutil.copy2(source, target)
+        copy_to_build(source, target)
+    return False
+
 
+@functools.lru_cache(maxsize=None)
+def _file_digest_cached(path, mtime_ns, size):
+    """Content digest of a file, memoized on its stat signature the same
+    way _fread_cached is, so a source that feeds several sites is read
+    and hashed once per run instead of once per add_to_build call."""
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').digest()
 
-def add_to_build(source, target, params):
+
+def add_to_build(source, target, params, source_stat=None):
     link_if_bigger_than = 4 * 1024 * 1024
-    build_permissions = stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP | stat.S_IROTH
+    build_permissions = _build_permissions
     build_path = os.path.join(params['data_root'], 'build', params['build_target'])
     if target.startswith('/'):
         target = target[1:]
     target = os.path.join(params['site_dir'], target)
+    # Stat the source once up front and reuse the result below. Callers that
+    # just enumerated a directory can pass the stat they already have.
+    # A stat that fails means source holds direct file contents, not a path.
+    if source_stat is None:
+        try:
+            source_stat = os.stat(source)
+        except (OSError, ValueError):
+            source_stat = None
+    source_is_file = source_stat is not None and stat.S_ISREG(source_stat.st_mode)
     if target.endswith('.html'):
-        if os.path.isfile(source):
+        if source_is_file:
             source = fread(source)
-        source = htmlmin.minify(source, remove_empty_space=True, remove_comments=True, remove_optional_attribute_quotes=False)
+            source_is_file = False
+        source = minify_html.minify(source, minify_css=False, minify_js=False, keep_comments=False,
+                                    do_not_minify_doctype=True, ensure_spec_compliant_unquoted_attribute_values=True,
+                                    keep_html_and_head_opening_tags=True)
     if target.endswith('.css'):
-        if os.path.isfile(source):
+        if source_is_file:
             source = fread(source)
+            source_is_file = False
         source = rcssmin.cssmin(source)
     if 'file_hash' not in params:
       params['file_hash'] = {}
-    params['file_hash'][target] = base64.b64encode(hashlib.sha256(source.encode('utf-8')).digest(), altchars=b'-_').decode('ascii')[:16]
+    if source_is_file:
+        digest = _file_digest_cached(source, source_stat.st_mtime_ns, source_stat.st_size)
+    else:
+        digest = hashlib.sha256(source.encode('utf-8')).digest()
+    file_hash = base64.b64encode(digest, altchars=b'-_').decode('ascii')[:16]
+    params['file_hash'][target] = file_hash
+    manifest = params.get('manifest')
     target_path = os.path.join(build_path, target)
-    if not os.path.isfile(target_path):
-        target_dir = os.path.dirname(target_path)
-        if not os.path.isdir(target_dir):
-            os.makedirs(target_dir)
-        # check if source is a path or direct file contents
-        if not os.path.isfile(source):
+    try:
+        target_stat = os.stat(target_path)
+    except OSError:
+        target_stat = None
+    if target_stat is None:
+        ensure_dir(os.path.dirname(target_path))
+        deferred = False
+        if not source_is_file:
             log('Adding {} from inline data ...'.format(target))
             fwrite(target_path, source)
         else:
             log('Adding {} from {} ...'.format(target, source))
-            if os.path.getsize(source) > link_if_bigger_than:
+            if source_stat.st_size > link_if_bigger_than:
                 os.symlink(source, target_path)
             else:
-                optimize_for_build(source, target_path)
-        os.chmod(target_path, build_permissions)
+                deferred = optimize_for_build(source, target_path, params)
+        if not deferred:
+            os.chmod(target_path, build_permissions)
     else:
-        target_stat = os.stat(target_path)
-        if not os.path.isfile(source):
-            target_content = fread(target_path)
-            if source != target_content:
+        if not source_is_file:
+            # The manifest remembers the hash each target was last written
+            # with, so an unchanged page can be skipped without reading the
+            # old file back from disk. Without a manifest entry, fall back
+            # to the byte comparison.
+            if manifest is not None and manifest.get(target) == file_hash:
+                pass
+            elif source != fread(target_path):
                 log('Adding {} from inline data ...'.format(target))
                 fwrite(target_path, source)
                 os.chmod(target_path, build_permissions)
@@ -209,18 +438,56 @@ def add_to_build(source, target, params):
                 # log('Skipping {} - existing file is identical'.format(target))
                 pass
         else:
-            source_stat = os.stat(source)
             if source_stat.st_mtime != target_stat.st_mtime or (source_stat.st_size != target_stat.st_size and not (source.endswith('.js') or source.endswith('.svg'))):
                 log('Adding {} from {} ...'.format(target, source))
-                if os.path.getsize(source) > link_if_bigger_than:
+                if source_stat.st_size > link_if_bigger_than:
                     os.remove(target_path)
                     os.symlink(source, target_path)
                     os.chmod(target_path, build_permissions)
                 else:
-                    optimize_for_build(source, target_path)
+                    optimize_for_build(source, target_path, params)
             else:
                 # log('Skipping {} - existing file is identical'.format(target))
                 pass
+    if manifest is not None and not source_is_file:
+        manifest[target] = file_hash
+
+
+def add_item_page(template, dst, params, **context):
+    """Render a single item page into the build, skipping the render
+    entirely when neither the item data, the template nor the relevant
+    site parameters have changed since the page was last written."""
+    manifest = params.get('manifest')
+    target = os.path.join(params['site_dir'], dst)
+    target_path = os.path.join(params['data_root'], 'build', params['build_target'], target)
+    # current_year and the asset hashes invalidate the key for the same
+    # reasons they feed the page cache fingerprint in make_pages: footers
+    # roll over with the year, and templates embed cache-busting asset
+    # URLs. As there, hashes of .html targets stay out of the key.
+    key_source = json.dumps({
+        'context': context,
+        'template': template.name,
+        'accent_color': params['accent_color'],
+        'hostname': params['hostname'],
+        'title': params['title'],
+        'self_path': params['self_path'],
+        'current_year': params['current_year'],
+        'file_hash': {target: file_hash
+                      for target, file_hash in params.get('file_hash', {}).items()
+                      if not target.endswith('.html')},
+    }, sort_keys=True, default=str)
+    # The whole templates tree feeds the key because item templates
+    # extend and include other templates; the leaf's own mtime would miss
+    # edits to the shared layout.
+    key_source += '|' + str(_templates_mtime(params['data_root']))
+    key = hashlib.sha256(key_source.encode('utf-8')).hexdigest()[:16]
+    manifest_key = 'item:' + target
+    if manifest is not None and manifest.get(manifest_key) == key and os.path.isfile(target_path):
+        return
+    output = template.render(**dict(context, **params))
+    add_to_build(output, dst, params)
+    if manifest is not None:
+        manifest[manifest_key] = key
 
 
 def sort_into_structure(title, breadcrumb, path, weight, structure):
@@ -243,16 +510,13 @@ def sort_into_structure(title, breadcrumb, path, weight, structure):
 
 def cleanup_structure(structure, collate_common=False):
     shared_keys = None
-    for entry in structure:
-        if 'children' in structure[entry]:
-            sections = [section for section in structure if 'children' in structure[section]]
-            if collate_common and len(sections) > 1:
-                if shared_keys is None:
-                    shared_keys = [key for key in structure[entry]['children']]
-                else:
-                    for key in copy.copy(shared_keys):
-                        if key not in structure[entry]['children']:
-                            shared_keys.remove(key)
+    sections = [section for section in structure if 'children' in structure[section]]
+    if collate_common and len(sections) > 1:
+        common = set(structure[sections[0]]['children'])
+        for section in sections[1:]:
+            common &= structure[section]['children'].keys()
+        # Preserve the child ordering of the first section.
+        shared_keys = [key for key in structure[sections[0]]['children'] if key in common]
     if shared_keys is not None and len(shared_keys) > 0:
         shared_entries = []
         for shared_key in shared_keys:
@@ -270,68 +534,324 @@ def cleanup_structure(structure, collate_common=False):
         if 'children' in structure[entry]:
             cleanup_structure(structure[entry]['children'], collate_common=False)
             children = [structure[entry]['children'][child] for child in structure[entry]['children']]
-            children.sort(key=lambda c: c['weight'])
+            children.sort(key=operator.itemgetter('weight'))
             structure[entry]['children'] = children
 
 
-def make_pages(page_list, destination, template, **params):
-    """Generate pages from page content."""
-    items = []
+# Worker state for the make_pages process pool, set up once per worker
+# process by _init_page_worker().
+_page_template = None
 
-    for src_path in page_list:
-        if os.path.basename(src_path)[0].isdigit():
-            continue
 
-        content = read_content(src_path)
-        for prop in list(content.keys()):
-            if prop.startswith('og:'):
-                name = prop[3:]
-                value = content[prop]
-                if 'open_graph' not in content:
-                    content['open_graph'] = {}
-                content['open_graph'][name] = value
+def _init_page_worker(data_root, template_name):
+    global _page_template
+    template_env = make_template_env(data_root)
+    _page_template = template_env.get_template(template_name)
 
-        page_params = dict(params, **content)
 
-        items.append(content)
+def _render_page(src_path, destination, params):
+    """Render a single page, returning everything the parent process needs
+    to integrate it into the build."""
+    content = read_content(src_path)
+    for prop in list(content.keys()):
+        if prop.startswith('og:'):
+            name = prop[3:]
+            value = content[prop]
+            if 'open_graph' not in content:
+                content['open_graph'] = {}
+            content['open_graph'][name] = value
 
-        dst_path = render(destination, **page_params)
-        
-        page_params['self_path'] = '/' + dst_path
-        if page_params['self_path'].endswith('.html'):
-            page_params['self_path'] = page_params['self_path'][:-5]
-        if page_params['self_path'].endswith('index'):
-            page_params['self_path'] = page_params['self_path'][:-5]
-        if page_params['self_path'].endswith('/'):
-            page_params['self_path'] = page_params['self_path'][:-1]
-        if os.path.basename(src_path)[0] == '_':
-            del page_params['self_path']
-
-        extra_head = []
-        if dst_path == 'imprint.html':
-            extra_head = ['<meta name="robots" content="noindex, follow">']
-        
-        output = template.render(extra_head=extra_head, **page_params)
-
-        if os.path.basename(src_path)[0] != '_' and os.path.basename(src_path) != 'index.html':
-            if 'breadcrumb' in page_params:
-                if ' ' in page_params['breadcrumb']:
-                    breadcrumb, weight = page_params['breadcrumb'].split(' ')
-                    weight = int(weight)
-                else:
-                    breadcrumb = page_params['breadcrumb']
-                    weight = 0
+    page_params = dict(params, **content)
+
+    dst_path = render(destination, **page_params)
+
+    page_params['self_path'] = '/' + dst_path
+    if page_params['self_path'].endswith('.html'):
+        page_params['self_path'] = page_params['self_path'][:-5]
+    if page_params['self_path'].endswith('index'):
+        page_params['self_path'] = page_params['self_path'][:-5]
+    if page_params['self_path'].endswith('/'):
+        page_params['self_path'] = page_params['self_path'][:-1]
+    if os.path.basename(src_path)[0] == '_':
+        del page_params['self_path']
+
+    extra_head = []
+    if dst_path == 'imprint.html':
+        extra_head = ['<meta name="robots" content="noindex, follow">']
+
+    output = _page_template.render(extra_head=extra_head, **page_params)
+
+    structure_entry = None
+    if os.path.basename(src_path)[0] != '_' and os.path.basename(src_path) != 'index.html':
+        if 'breadcrumb' in page_params:
+            if ' ' in page_params['breadcrumb']:
+                breadcrumb, weight = page_params['breadcrumb'].split(' ')
+                weight = int(weight)
             else:
-                breadcrumb = dst_path[:-5]
+                breadcrumb = page_params['breadcrumb']
                 weight = 0
-            sort_into_structure(page_params['title'], params['current_site'] + '/' + breadcrumb, dst_path[:-5], weight, params['structure'])
+        else:
+            breadcrumb = dst_path[:-5]
+            weight = 0
+        structure_entry = (page_params['title'], params['current_site'] + '/' + breadcrumb, dst_path[:-5], weight)
+
+    return dst_path, output, structure_entry, content
+
+
+@functools.lru_cache(maxsize=None)
+def _templates_mtime(data_root):
+    """Newest modification time across all template files, used to
+    invalidate cached page renders when any template changes, including
+    inherited and included ones."""
+    newest = 0
+    for dirpath, dirnames, filenames in os.walk(os.path.join(data_root, 'templates')):
+        for filename in filenames:
+            newest = max(newest, os.stat(os.path.join(dirpath, filename)).st_mtime_ns)
+    return newest
+
+
+def make_pages(page_list, destination, template, **params):
+    """Generate pages from page content."""
+    items = []
+
+    page_list = [p for p in page_list if not os.path.basename(p)[0].isdigit()]
+
+    # Rendered pages persist between runs, keyed by the source file, the
+    # templates and the scalar site parameters that feed into the render,
+    # so a warm build only pays for pages whose inputs changed.
+    cache_dir = os.path.join(params['data_root'], 'cache', 'pages')
+    ensure_dir(cache_dir)
+    cache_path = os.path.join(cache_dir, params['build_target'] + '-' + params['site_dir'] + '.pickle')
+    try:
+        with open(cache_path, 'rb') as f:
+            page_cache = pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError):
+        page_cache = {}
+    # rfc_2822_now is regenerated on every run; keying the cache on it
+    # would invalidate every page every build. current_year stays in, so
+    # the cache rolls over with the year instead of serving stale footers.
+    fingerprinted = {key: value for key, value in params.items()
+                     if isinstance(value, (str, int, float, bool)) and key != 'rfc_2822_now'}
+    # Pages also see the asset hashes (cache-busting URLs) and the sites
+    # list (cross-site navigation), so those invalidate the cache too.
+    # Hashes of .html targets stay out: they only appear once their page
+    # has been written, which would make the fingerprint depend on what
+    # earlier runs happened to skip.
+    fingerprinted['file_hash'] = {target: file_hash
+                                  for target, file_hash in params.get('file_hash', {}).items()
+                                  if not target.endswith('.html')}
+    fingerprinted['sites'] = params.get('sites')
+    fingerprint = hashlib.sha256(json.dumps(fingerprinted, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    template_mtime = _templates_mtime(params['data_root'])
+
+    results = []
+    pending = []
+    for src_path in page_list:
+        src_stat = os.stat(src_path)
+        sig = (src_stat.st_mtime_ns, src_stat.st_size, template_mtime, template.name, destination, fingerprint)
+        cached = page_cache.get(src_path)
+        if cached is not None and cached[0] == sig:
+            results.append(cached[1])
+        else:
+            pending.append((src_path, sig))
+
+    if pending:
+        # Pages are independent of each other, so rendering fans out
+        # across cores. Updates to the shared structure and the build
+        # directory happen in the parent only, from the values each
+        # worker returns.
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                initializer=_init_page_worker,
+                initargs=(params['data_root'], template.name)) as executor:
+            worker = functools.partial(_render_page, destination=destination, params=params)
+            for (src_path, sig), result in zip(pending, executor.map(worker, [src_path for src_path, sig in pending])):
+                page_cache[src_path] = (sig, result)
+                results.append(result)
+        with open(cache_path, 'wb') as f:
+            pickle.dump(page_cache, f)
+
+    for dst_path, output, structure_entry, content in results:
+        items.append(content)
+        if structure_entry is not None:
+            title, breadcrumb, path, weight = structure_entry
+            sort_into_structure(title, breadcrumb, path, weight, params['structure'])
         add_to_build(output, dst_path, params)
 
     return sorted(items, key=lambda x: x['date'], reverse=True)
 
 
+# Shared executor for overlapping external tool invocations. Threads are
+# sufficient because the GIL is released while waiting on subprocesses.
+_tool_executor = None
+
+
+def get_tool_executor():
+    global _tool_executor
+    if _tool_executor is None:
+        _tool_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2 * os.cpu_count())
+    return _tool_executor
+
+
+def render_pdf_page(pdf_path):
+    """Rasterize the first PDF page once at full density, with the tint
+    check already applied, ready to be downscaled to thumbnail sizes."""
+    page = pypdfium2.PdfDocument(pdf_path)[0]
+    image = page.render(scale=600 / 72).to_pil().convert('RGB')
+    pixels = numpy.asarray(image, dtype=numpy.int32)
+    # Same fixed-point luma as Pillow's convert('L'), so the measured tint
+    # is identical to the old convert-twice-and-difference approach while
+    # only touching the pixel data once.
+    luma = (pixels[..., 0] * 19595 + pixels[..., 1] * 38470 + pixels[..., 2] * 7471 + 0x8000) >> 16
+    tint_sum = int(numpy.abs(pixels - luma[..., None]).sum())
+    tinted_quotient = tint_sum / (image.width * image.height)
+    if tinted_quotient < 0.1:
+        image = image.convert('L')
+    return image
+
+
+def crush_png(image, target_path):
+    """Crush an image into target_path as a PNG, piping the encoded bytes
+    through pngcrush so no interim file touches the disk. A failed crush
+    falls back to the plain encode, like the pngquant guard in
+    thumbnail_png_job, so the cache never holds an empty image."""
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG')
+    png_bytes = buffer.getvalue()
+    crushed = subprocess.run(['pngcrush', '-'], input=png_bytes, stdout=subprocess.PIPE)
+    if crushed.returncode == 0 and crushed.stdout:
+        png_bytes = crushed.stdout
+    with open(target_path, 'wb') as f:
+        f.write(png_bytes)
+
+
+def thumbnail_png_job(page_image, thumbnail_path, size):
+    """Downscale the rendered PDF page into a quantized, crushed PNG
+    thumbnail. An 8-bit palette roughly halves the file size of these
+    mostly-text pages; pngquant leaves the image alone (non-zero exit)
+    when it cannot stay within the quality window."""
+    height = max(1, round(page_image.height * size / page_image.width))
+    thumbnail = page_image.resize((size, height), resample=PIL.Image.LANCZOS)
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, 'PNG')
+    png_bytes = buffer.getvalue()
+    quantized = subprocess.run(['pngquant', '--quality=70-90', '-'], input=png_bytes, stdout=subprocess.PIPE)
+    if quantized.returncode == 0 and quantized.stdout:
+        png_bytes = quantized.stdout
+    crushed = subprocess.run(['pngcrush', '-'], input=png_bytes, stdout=subprocess.PIPE)
+    if crushed.returncode == 0 and crushed.stdout:
+        png_bytes = crushed.stdout
+    with open(thumbnail_path + 'png', 'wb') as f:
+        f.write(png_bytes)
+    return list(thumbnail.size)
+
+
+def thumbnail_encode_job(thumbnail_path):
+    """Encode the cached PNG thumbnail into WebP and AVIF in-process,
+    decoding the pixel data only once for both encoders."""
+    need_webp = not os.path.isfile(thumbnail_path + 'webp')
+    need_avif = not os.path.isfile(thumbnail_path + 'avif')
+    if not need_webp and not need_avif:
+        return
+    image = PIL.Image.open(thumbnail_path + 'png')
+    if need_webp:
+        image.save(thumbnail_path + 'webp', 'WEBP', quality=35, method=6, lossless=False)
+    if need_avif:
+        image.save(thumbnail_path + 'avif', 'AVIF', quality=35, speed=2)
+
+
+def tint_image(image, rgb):
+    """Multiply an RGBA image with a solid tint color in one numpy pass,
+    without allocating a full-size solid-color image first. The rounding
+    matches Pillow's multiply, so existing caches stay byte-identical."""
+    pixels = numpy.asarray(image, dtype=numpy.uint32).copy()
+    product = pixels[..., :3] * numpy.asarray(rgb, dtype=numpy.uint32) + 128
+    pixels[..., :3] = (product + (product >> 8)) >> 8
+    return PIL.Image.fromarray(pixels.astype(numpy.uint8), 'RGBA')
+
+
+def favicon_size_job(favicon_large, size, favicon_cache):
+    """Downscale the tinted favicon to one size and crush it into the
+    cache. The eight sizes are independent, so these jobs run on the
+    shared tool executor and the pngcrush invocations overlap."""
+    favicon = favicon_large.resize((size, size), resample=PIL.Image.LANCZOS)
+    crush_png(favicon, favicon_cache)
+
+
+def error_404_png_job(error_404_full, target_path):
+    """Quantize the error page illustration to PNG8 and crush it, piping
+    between the tools instead of using interim files. Nothing is written
+    when convert fails, so the next run retries instead of caching an
+    empty image; a failed crush falls back to the unquashed PNG8."""
+    converted = subprocess.run(['convert', error_404_full, '+dither', '-colors', '256', '-alpha', 'background', 'PNG8:-'], stdout=subprocess.PIPE)
+    if converted.returncode != 0 or not converted.stdout:
+        log('WARNING: convert failed for {}', target_path)
+        return
+    png_bytes = converted.stdout
+    crushed = subprocess.run(['pngcrush', '-'], input=png_bytes, stdout=subprocess.PIPE)
+    if crushed.returncode == 0 and crushed.stdout:
+        png_bytes = crushed.stdout
+    with open(target_path, 'wb') as f:
+        f.write(png_bytes)
+
+
+def generate_pdf_thumbnails(pdf_path, url_id, cache_dir, item, params):
+    """Create the PNG/WebP/AVIF thumbnail set for the first page of a PDF
+    and register it with the build.
+
+    Sets thumbnail_size and has_thumbnail on item, which is a publication
+    or student thesis entry."""
+    executor = get_tool_executor()
+    thumbnail_base_size = 400
+    # The page is rasterized at most once per PDF; the PNGs for the three
+    # sizes build concurrently, and webp and avif encodes start as soon as
+    # their PNG exists and overlap with everything else.
+    thumbnail_paths = {}
+    png_futures = {}
+    page_image = None
+    for size_factor in [1, 2, 3]:
+        thumbnail_filename = url_id + '_thumbnail.'
+        if size_factor != 1:
+            thumbnail_filename = thumbnail_filename[:-1] + '-' + str(size_factor) + 'x.'
+        thumbnail_path = os.path.join(cache_dir, thumbnail_filename)
+        thumbnail_paths[size_factor] = (thumbnail_filename, thumbnail_path)
+        if os.path.isfile(thumbnail_path + 'png'):
+            png_futures[size_factor] = None
+        else:
+            if page_image is None:
+                page_image = render_pdf_page(pdf_path)
+            png_futures[size_factor] = executor.submit(thumbnail_png_job, page_image, thumbnail_path, thumbnail_base_size * size_factor)
+    encode_futures = []
+    for size_factor in [1, 2, 3]:
+        thumbnail_filename, thumbnail_path = thumbnail_paths[size_factor]
+        if png_futures[size_factor] is not None:
+            item['thumbnail_size'] = png_futures[size_factor].result()
+        add_to_build(thumbnail_path + 'png', os.path.join('assets', thumbnail_filename + 'png'), params)
+        encode_future = executor.submit(thumbnail_encode_job, thumbnail_path)
+        encode_futures.append((thumbnail_filename, thumbnail_path, encode_future))
+    for thumbnail_filename, thumbnail_path, encode_future in encode_futures:
+        encode_future.result()
+        add_to_build(thumbnail_path + 'webp', os.path.join('assets', thumbnail_filename + 'webp'), params)
+        add_to_build(thumbnail_path + 'avif', os.path.join('assets', thumbnail_filename + 'avif'), params)
+    if 'thumbnail_size' not in item:
+        image = PIL.Image.open(thumbnail_paths[3][1] + 'png')
+        item['thumbnail_size'] = list(image.size)
+    item['has_thumbnail'] = True
+
+
+# Translation tables for BibTeX output, applied in a single pass each.
+_bibtex_id_trans = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue',
+                                  'Ä': 'Ae', 'Ö': 'Oe', 'Ü': 'Ue',
+                                  'ß': 'ss'})
+_bibtex_value_trans = str.maketrans({'ä': '{\\"{a}}', 'ö': '{\\"{o}}', 'ü': '{\\"{u}}',
+                                     'Ä': '{\\"{A}}', 'Ö': '{\\"{O}}', 'Ü': '{\\"{U}}',
+                                     'ß': '{\\ss}', '–': '--'})
+
+
 def prepare_pub_files(pubs, params, template_env):
     source_dir = os.path.join(params['data_root'], 'content', 'science')
+    site_url = params['protocol'] + params['hostname'] + params['hostname_suffix']
+    asset_base = site_url + '/assets/'
     cache_dir = os.path.join(params['data_root'], 'cache', 'publications')
     if not os.path.isdir(cache_dir):
         os.makedirs(cache_dir)
@@ -339,11 +859,19 @@ def prepare_pub_files(pubs, params, template_env):
         'conference-paper': 'inproceedings',
         'conference-poster': 'inproceedings'
     }
+    pub_template = template_env.get_template('science/publication-page.html')
+    # One directory scan serves every publication; the files are grouped
+    # by their id stem instead of running a glob per publication.
+    pub_files_by_id = {}
+    for dir_entry in os.scandir(source_dir):
+        if dir_entry.is_file() and '.' in dir_entry.name:
+            stem = dir_entry.name.split('.', 1)[0]
+            pub_files_by_id.setdefault(stem, []).append(dir_entry.path)
+    deferred_svg_jobs = []
     for pub in pubs:
         if 'url_id' not in pub:
             continue
-        pub_files = glob.glob(os.path.join(source_dir, str(pub['id'])+'.*'))
-        pub_files.sort()
+        pub_files = sorted(pub_files_by_id.get(str(pub['id']), []))
         for pub_file in pub_files:
             extension = os.path.splitext(pub_file)[1]
             if extension == '.html' and ('not_published_yet' not in pub or params['build_target'] == 'dev'):
@@ -353,51 +881,21 @@ def prepare_pub_files(pubs, params, template_env):
             if 'not_published_yet' not in pub:
                 pub['has_download_'+extension[1:]] = True
             if extension == '.pdf':
-                thumbnail_base_size = 400
-                for size_factor in [1, 2, 3]:
-                    thumbnail_filename = pub['url_id'] + '_thumbnail.'
-                    if size_factor != 1:
-                        thumbnail_filename = thumbnail_filename[:-1] + '-' + str(size_factor) + 'x.'
-                    thumbnail_path = os.path.join(cache_dir, thumbnail_filename)
-                    if not os.path.isfile(thumbnail_path + 'png'):
-                        thumbnail_interim = thumbnail_path[:-1] + '-precrush.png'
-                        subprocess.run(['convert', '-density', '600', pub_file+'[0]',
-                                        '-alpha', 'remove', '-resize', str(thumbnail_base_size * size_factor), thumbnail_interim])
-                        image = PIL.Image.open(thumbnail_interim)
-                        image = image.convert('RGB')
-                        image_grayscale = image.convert('L').convert('RGB')
-                        difference = PIL.ImageChops.difference(image, image_grayscale)
-                        tint_sum = 0
-                        for pixel in difference.getdata():
-                            if pixel != (0, 0, 0):
-                                tint_sum += pixel[0] + pixel[1] + pixel[2]
-                        tinted_quotient = tint_sum / (image.width * image.height)
-                        if tinted_quotient < 0.1:
-                            image = image.convert('L')
-                        image.save(thumbnail_interim)
-                        subprocess.run(['pngcrush', thumbnail_interim, thumbnail_path + 'png'])
-                        os.remove(thumbnail_interim)
-                        pub['thumbnail_size'] = list(image.size)
-                    add_to_build(thumbnail_path + 'png', os.path.join('assets', thumbnail_filename + 'png'), params)
-                    if not os.path.isfile(thumbnail_path + 'webp'):
-                        subprocess.run(['cwebp', '-preset', 'text', '-q', '35', '-m', '6', '-noalpha', thumbnail_path + 'png', '-o', thumbnail_path + 'webp'])
-                    add_to_build(thumbnail_path + 'webp', os.path.join('assets', thumbnail_filename + 'webp'), params)
-                    if not os.path.isfile(thumbnail_path + 'avif'):
-                        subprocess.run(['cavif', '--quality', '35', thumbnail_path + 'png', '-o', thumbnail_path + 'avif'])
-                    add_to_build(thumbnail_path + 'avif', os.path.join('assets', thumbnail_filename + 'avif'), params)
-                if 'thumbnail_size' not in pub:
-                    image = PIL.Image.open(thumbnail_path + 'png')
-                    pub['thumbnail_size'] = list(image.size)
-                pub['has_thumbnail'] = True
+                generate_pdf_thumbnails(pub_file, pub['url_id'], cache_dir, pub, params)
                 if 'content_html' not in pub and 'not_published_yet' not in pub:
-                    if not os.path.isfile(os.path.join(cache_dir, pub['url_id'] + '_page1.svg')):
+                    # The PDF itself knows how many pages it has, so the
+                    # expected file names are computed up front instead of
+                    # enumerated from the cache directory afterwards. This
+                    # also recovers cleanly when a previous pdf2svg run
+                    # only produced part of its output.
+                    page_count = len(pypdfium2.PdfDocument(pub_file))
+                    svg_pages = [os.path.join(cache_dir, pub['url_id'] + '_page' + str(page) + '.svg')
+                                 for page in range(1, page_count + 1)]
+                    future = None
+                    if not all(os.path.isfile(svg) for svg in svg_pages):
                         svg_path = os.path.join(cache_dir, pub['url_id'] + '_page%d.svg')
-                        subprocess.run(['pdf2svg', pub_file, svg_path, 'all'])
-                    svg_pages = glob.glob(os.path.join(cache_dir, pub['url_id'] + '_page*.svg'))
-                    for svg in svg_pages:
-                        add_to_build(svg, os.path.join('assets', os.path.basename(svg)), params)
-                    if len(svg_pages) > 0:
-                        pub['content_svg'] = len(svg_pages)
+                        future = get_tool_executor().submit(subprocess.run, ['pdf2svg', pub_file, svg_path, 'all'])
+                    deferred_svg_jobs.append((future, svg_pages, pub))
 
         bibtex_data = collections.OrderedDict()
         if 'authors' in pub:
@@ -410,9 +908,7 @@ def prepare_pub_files(pubs, params, template_env):
         bibtex_data['title'] = pub['title']
         bibtex_data['year'] = pub['year']
         bibtex_id += pub['year']
-        bibtex_id = bibtex_id.replace('ä', 'ae').replace('ö', 'oe').replace('ü', 'ue')
-        bibtex_id = bibtex_id.replace('Ä', 'Ae').replace('Ö', 'Oe').replace('Ü', 'Ue')
-        bibtex_id = bibtex_id.replace('ß', 'ss')
+        bibtex_id = bibtex_id.translate(_bibtex_id_trans)
         bibtex_type = None
         if pub['type'] in bibtex_type_map:
             bibtex_type = bibtex_type_map[pub['type']]
@@ -455,37 +951,52 @@ def prepare_pub_files(pubs, params, template_env):
         if 'canonical_url' in pub:
             bibtex_data['url'] = pub['canonical_url']
         else:
-            bibtex_data['url'] = params['protocol'] + params['hostname'] + params['hostname_suffix'] + '/' + pub['url_id']
+            bibtex_data['url'] = site_url + '/' + pub['url_id']
         if bibtex_type is None:
             print('No type mapping found:', pub['type'])
-        bibtex = '@' + bibtex_type + '{' + bibtex_id + ',\n'
+        bibtex_parts = ['@' + bibtex_type + '{' + bibtex_id + ',\n']
         for part in bibtex_data:
-            value = bibtex_data[part]
-            value = value.replace('ä', '{\\"{a}}').replace('ö', '{\\"{o}}').replace('ü', '{\\"{u}}')
-            value = value.replace('Ä', '{\\"{A}}').replace('Ö', '{\\"{O}}').replace('Ü', '{\\"{U}}')
-            value = value.replace('ß', '{\\ss}')
-            value = value.replace('–', '--')
-            bibtex += '  ' + part + ' = {' + value + '},\n'
-        bibtex = bibtex[:-2] + '\n}'
+            value = bibtex_data[part].translate(_bibtex_value_trans)
+            bibtex_parts.append('  ' + part + ' = {' + value + '},\n')
+        bibtex = ''.join(bibtex_parts)[:-2] + '\n}'
         add_to_build(bibtex, pub['url_id']+'.bib', params)
         pub['has_cite_bibtex'] = True
 
-        pub_template = template_env.get_template('science/publication-page.html')
+    # The pdf2svg conversions overlap with the thumbnail and BibTeX work
+    # for the other publications; they are collected here, before the
+    # publication pages render, so each page sees the SVGs that actually
+    # exist rather than the count the conversion was expected to produce.
+    for future, svg_pages, pub in deferred_svg_jobs:
+        if future is not None and future.result().returncode != 0:
+            log('WARNING: pdf2svg failed for {}', pub['url_id'])
+        # A failed or partial conversion degrades to the contiguous run
+        # of pages that is present, the way the old directory glob did.
+        svg_pages = list(itertools.takewhile(os.path.isfile, svg_pages))
+        for svg in svg_pages:
+            add_to_build(svg, os.path.join('assets', os.path.basename(svg)), params)
+        if len(svg_pages) > 0:
+            pub['content_svg'] = len(svg_pages)
+
+    for pub in pubs:
+        if 'url_id' not in pub:
+            continue
         params['title'] = pub['title']
         params['self_path'] = '/' + pub['url_id']
         open_graph = {
             'type': 'article',
-            'image': params['protocol'] + params['hostname'] + params['hostname_suffix'] + '/assets/' + pub['url_id'] + '_thumbnail-2x.png',
+            'image': asset_base + pub['url_id'] + '_thumbnail-2x.png',
             'image:alt': 'First page of the print version of this article'
         }
         if 'abstract' in pub:
             sentences = pub['abstract'].split('. ')
-            description = ''
-            for sentence in sentences:
-                description += sentence + '. '
-                if len(description) > 150:
-                    description = description[:-1]
-                    break
+            # Prefix sums of the sentence lengths locate the cutoff without
+            # growing a string sentence by sentence.
+            lengths = list(itertools.accumulate(len(sentence) + 2 for sentence in sentences))
+            cut = bisect.bisect_right(lengths, 150)
+            if cut < len(sentences):
+                description = '. '.join(sentences[:cut + 1]) + '.'
+            else:
+                description = '. '.join(sentences) + '. '
             open_graph['description'] = description
         output = pub_template.render(publication=pub, open_graph=open_graph, css='publication.css', **params)
         weight = -1 * int(pub['year']+pub['month']+pub['day'])
@@ -495,21 +1006,32 @@ def prepare_pub_files(pubs, params, template_env):
 
 def compile_site(site, params):
 
-    for static_source in ['all', site['name'].lower()]:
+    site_lower = site['name'].lower()
+    asset_base = params['protocol'] + params['hostname'] + params['hostname_suffix'] + '/assets/'
+
+    pubs_future = None
+    if site['name'] == 'Science':
+        orcid_cache_dir = os.path.join(params['data_root'], 'cache', 'orcid')
+        if not os.path.isdir(orcid_cache_dir):
+            os.makedirs(orcid_cache_dir)
+        # The publication list may involve a network round trip to ORCID,
+        # but it is not needed until after the static files and pages are
+        # done, so the lookup runs on the shared executor in the meantime.
+        pubs_future = get_tool_executor().submit(orcid.get, site['orcid'], orcid_cache_dir)
+
+    for static_source in ['all', site_lower]:
         static_path = os.path.join(params['data_root'], 'static', static_source)
         if os.path.isdir(static_path):
-            everything = glob.glob(os.path.join(static_path, '**'), recursive=True)
-            for item in everything:
-                if os.path.isdir(item):
-                    continue
-                target_path = item[len(static_path):]
-                add_to_build(item, target_path, params)
+            for dirpath, dirnames, filenames in os.walk(static_path):
+                for filename in filenames:
+                    item = os.path.join(dirpath, filename)
+                    target_path = item[len(static_path):]
+                    add_to_build(item, target_path, params)
 
-    templates_path = os.path.join(params['data_root'], 'templates')
-    template_env = jinja2.Environment(loader=jinja2.FileSystemLoader(templates_path))
+    template_env = make_template_env(params['data_root'])
 
     content_path = os.path.join(params['data_root'], 'content', 'all')
-    site_content_path = os.path.join(params['data_root'], 'content', site['name'].lower())
+    site_content_path = os.path.join(params['data_root'], 'content', site_lower)
 
     additional_templates = ['main.css', 'robots.txt']
     for additional_template in additional_templates:
@@ -532,14 +1054,10 @@ def compile_site(site, params):
     make_pages(page_list, '{{ slug }}.html', page_template, **params)
 
     if site['name'] == 'Science':
-        orcid_cache_dir = os.path.join(params['data_root'], 'cache', 'orcid')
-        if not os.path.isdir(orcid_cache_dir):
-            os.makedirs(orcid_cache_dir)
-        pubs = orcid.get(site['orcid'], orcid_cache_dir)
-        pubs.sort(key=lambda p: p['year']+p['month']+p['day'])
+        pubs = pubs_future.result()
+        pubs.sort(key=operator.itemgetter('year', 'month', 'day'))
         pubs.reverse()
-        with open(os.path.join(params['data_root'], 'content', 'science', 'publications.json')) as fp:
-            metadata = json.load(fp)
+        metadata = load_json(os.path.join(params['data_root'], 'content', 'science', 'publications.json'))
         for pub in pubs:
             pub_id = str(pub['id'])
             if pub_id in metadata:
@@ -573,10 +1091,9 @@ def compile_site(site, params):
         feed_output = feed_template.render(pubs=pubs, **params)
         add_to_build(feed_output, 'publications.xml', params)
 
-        with open(os.path.join(params['data_root'], 'content', 'science', 'student_theses.json')) as fp:
-            student_theses = json.load(fp)
-        student_theses = [student_theses[id] for id in student_theses]
-        student_theses.sort(key=lambda t: t['year']+t['month']+t['day'])
+        student_theses = load_json(os.path.join(params['data_root'], 'content', 'science', 'student_theses.json'))
+        student_theses = list(student_theses.values())
+        student_theses.sort(key=operator.itemgetter('year', 'month', 'day'))
         student_theses.reverse()
         source_dir = os.path.join(params['data_root'], 'content', 'science')
         student_theses_cache_dir = os.path.join(params['data_root'], 'cache', 'student_theses')
@@ -588,42 +1105,7 @@ def compile_site(site, params):
                 continue
             if thesis['enable_download']:
                 add_to_build(pdf_path, thesis['url_id'] + '.pdf', params)
-            thumbnail_base_size = 400
-            for size_factor in [1, 2, 3]:
-                thumbnail_filename = thesis['url_id'] + '_thumbnail.'
-                if size_factor != 1:
-                    thumbnail_filename = thumbnail_filename[:-1] + '-' + str(size_factor) + 'x.'
-                thumbnail_path = os.path.join(student_theses_cache_dir, thumbnail_filename)
-                if not os.path.isfile(thumbnail_path + 'png'):
-                    thumbnail_interim = thumbnail_path[:-1] + '-precrush.png'
-                    subprocess.run(['convert', '-density', '600', pdf_path+'[0]',
-                                    '-alpha', 'remove', '-resize', str(thumbnail_base_size * size_factor), thumbnail_interim])
-                    image = PIL.Image.open(thumbnail_interim)
-                    image = image.convert('RGB')
-                    image_grayscale = image.convert('L').convert('RGB')
-                    difference = PIL.ImageChops.difference(image, image_grayscale)
-                    tint_sum = 0
-                    for pixel in difference.getdata():
-                        if pixel != (0, 0, 0):
-                            tint_sum += pixel[0] + pixel[1] + pixel[2]
-                    tinted_quotient = tint_sum / (image.width * image.height)
-                    if tinted_quotient < 0.1:
-                        image = image.convert('L')
-                    image.save(thumbnail_interim)
-                    subprocess.run(['pngcrush', thumbnail_interim, thumbnail_path + 'png'])
-                    os.remove(thumbnail_interim)
-                    thesis['thumbnail_size'] = list(image.size)
-                add_to_build(thumbnail_path + 'png', os.path.join('assets', thumbnail_filename + 'png'), params)
-                if not os.path.isfile(thumbnail_path + 'webp'):
-                    subprocess.run(['cwebp', '-preset', 'text', '-q', '35', '-m', '6', '-noalpha', thumbnail_path + 'png', '-o', thumbnail_path + 'webp'])
-                add_to_build(thumbnail_path + 'webp', os.path.join('assets', thumbnail_filename + 'webp'), params)
-                if not os.path.isfile(thumbnail_path + 'avif'):
-                    subprocess.run(['cavif', '--quality', '35', thumbnail_path + 'png', '-o', thumbnail_path + 'avif'])
-                add_to_build(thumbnail_path + 'avif', os.path.join('assets', thumbnail_filename + 'avif'), params)
-            if 'thumbnail_size' not in thesis:
-                image = PIL.Image.open(thumbnail_path + 'png')
-                thesis['thumbnail_size'] = list(image.size)
-            thesis['has_thumbnail'] = True
+            generate_pdf_thumbnails(pdf_path, thesis['url_id'], student_theses_cache_dir, thesis, params)
         teaching_template = template_env.get_template('science/teaching.html')
         params['title'] = 'Teaching'
         params['self_path'] = '/teaching'
@@ -636,9 +1118,8 @@ def compile_site(site, params):
         add_to_build(output, 'teaching.html', params)
 
     if site['name'] == 'Software':
-        with open(os.path.join(params['data_root'], 'content', 'software', 'projects.json')) as fp:
-            projects = json.load(fp)
-        projects = [projects[id] for id in projects]
+        projects = load_json(os.path.join(params['data_root'], 'content', 'software', 'projects.json'))
+        projects = list(projects.values())
         projects.sort(key=lambda p: p['title'].lower())
         template = template_env.get_template('software/index.html')
         params['self_path'] = ''
@@ -670,13 +1151,14 @@ def compile_site(site, params):
             open_graph = {
                 'description': category_data[category]['description']
             }
-            output = template.render(projects=projects, project_category=category, open_graph=open_graph, **params)
+            category_projects = [proj for proj in projects if proj['category'] == category]
+            output = template.render(projects=category_projects, project_category=category, open_graph=open_graph, **params)
             sort_into_structure(params['title'], params['current_site'] + '/' + url_segment, url_segment, category_data[category]['weight'], params['structure'])
             add_to_build(output, url_segment + '.html', params)
 
+        template = template_env.get_template('software/project.html')
         weight = 1
         for proj in projects:
-            template = template_env.get_template('software/project.html')
             params['title'] = proj['title']
             params['self_path'] = '/' + proj['url_id']
             css = ''
@@ -684,19 +1166,17 @@ def compile_site(site, params):
                 css = 'readerbar.css'
             open_graph = {
                 'description': proj['summary'],
-                'image': params['protocol'] + params['hostname'] + params['hostname_suffix'] + '/assets/' + proj['logo'][-1],
+                'image': asset_base + proj['logo'][-1],
                 'image:alt': proj['title'] + ' logo'
             }
-            output = template.render(proj=proj, css=css, open_graph=open_graph, **params)
+            add_item_page(template, proj['url_id'] + '.html', params, proj=proj, css=css, open_graph=open_graph)
             sort_into_structure(params['title'], params['current_site'] + '/' + category_data[proj['category']]['url_segment'] + '/' + proj['url_id'], proj['url_id'], weight, params['structure'])
             weight += 1
-            add_to_build(output, proj['url_id'] + '.html', params)
 
     if site['name'] == 'Media':
-        with open(os.path.join(params['data_root'], 'content', 'media', 'games.json')) as fp:
-            games = json.load(fp)
-        games = [games[id] for id in games]
-        games.sort(key=lambda p: p['date'])
+        games = load_json(os.path.join(params['data_root'], 'content', 'media', 'games.json'))
+        games = list(games.values())
+        games.sort(key=operator.itemgetter('date'))
         games.reverse()
         template = template_env.get_template('media/games.html')
         params['title'] = 'Games'
@@ -708,9 +1188,9 @@ def compile_site(site, params):
         sort_into_structure(params['title'], params['current_site'] + '/games', 'games', 1, params['structure'])
         add_to_build(output, 'games.html', params)
 
+        template = template_env.get_template('media/game.html')
         weight = 1
         for proj in games:
-            template = template_env.get_template('media/game.html')
             params['title'] = proj['title']
             params['self_path'] = '/' + proj['url_id']
             proj['pretty_date'] = pretty_format(proj['date'])
@@ -721,51 +1201,47 @@ def compile_site(site, params):
                 css = 'player.css'
             open_graph = {
                 'description': proj['summary'],
-                'image': params['protocol'] + params['hostname'] + params['hostname_suffix'] + '/assets/' + proj['logo'][-1],
+                'image': asset_base + proj['logo'][-1],
                 'image:alt': proj['title'] + ' logo'
             }
-            output = template.render(proj=proj, css=css, open_graph=open_graph, **params)
+            add_item_page(template, proj['url_id'] + '.html', params, proj=proj, css=css, open_graph=open_graph)
             sort_into_structure(params['title'], params['current_site'] + '/games/' + proj['url_id'], proj['url_id'], weight, params['structure'])
             weight += 1
-            add_to_build(output, proj['url_id'] + '.html', params)
 
-        with open(os.path.join(params['data_root'], 'content', 'media', 'videos.json')) as fp:
-            videos = json.load(fp)
-        videos = [videos[id] for id in videos]
-        videos.sort(key=lambda v: v['date']+v['title'])
+        videos = load_json(os.path.join(params['data_root'], 'content', 'media', 'videos.json'))
+        videos = list(videos.values())
+        videos.sort(key=operator.itemgetter('date', 'title'))
         template = template_env.get_template('media/videos.html')
         params['title'] = 'Videos: Working with LaTeX'
         params['self_path'] = '/videos'
         open_graph = {
             'description': 'In 2011 and 2012 I created a series of video tutorials about using LaTeX in an academic environment, especially as a student. They were accompanied by a seminar where students were able to attend and ask questions.',
-            'image': params['protocol'] + params['hostname'] + params['hostname_suffix'] + '/assets/arbeiten_mit_latex_ankuendigung_poster.png',
+            'image': asset_base + 'arbeiten_mit_latex_ankuendigung_poster.png',
             'image:alt': 'Working with LaTeX logo'
         }
         output = template.render(videos=videos, open_graph=open_graph, **params)
         sort_into_structure(params['title'], params['current_site'] + '/videos', 'videos', 2, params['structure'])
         add_to_build(output, 'videos.html', params)
 
+        template = template_env.get_template('media/video.html')
         weight = 1
         for video in videos:
-            template = template_env.get_template('media/video.html')
             params['title'] = video['title']
             params['self_path'] = '/' + video['url_id']
             video['pretty_date'] = pretty_format(video['date'])
             open_graph = {
                 'description': 'Arbeiten mit LaTeX – ' + video['title'],
-                'image': params['protocol'] + params['hostname'] + params['hostname_suffix'] + '/assets/' + video['url_id'] + '_poster.png',
+                'image': asset_base + video['url_id'] + '_poster.png',
                 'image:alt': video['title'] + ' (starting slide)',
                 'type': 'video.episode'
             }
-            output = template.render(video=video, open_graph=open_graph, **params)
+            add_item_page(template, video['url_id'] + '.html', params, video=video, open_graph=open_graph)
             sort_into_structure(params['title'], params['current_site'] + '/videos/' + video['url_id'], video['url_id'], weight, params['structure'])
             weight += 1
-            add_to_build(output, video['url_id'] + '.html', params)
 
-        with open(os.path.join(params['data_root'], 'content', 'media', 'misc.json')) as fp:
-            miscs = json.load(fp)
-        miscs = [miscs[id] for id in miscs]
-        miscs.sort(key=lambda p: p['title'])
+        miscs = load_json(os.path.join(params['data_root'], 'content', 'media', 'misc.json'))
+        miscs = list(miscs.values())
+        miscs.sort(key=operator.itemgetter('title'))
         template = template_env.get_template('media/miscs.html')
         params['title'] = 'Miscellaneous'
         params['self_path'] = '/misc'
@@ -776,21 +1252,20 @@ def compile_site(site, params):
         sort_into_structure(params['title'], params['current_site'] + '/misc', 'misc', 3, params['structure'])
         add_to_build(output, 'misc.html', params)
 
+        template = template_env.get_template('media/misc.html')
         weight = 1
         for misc in miscs:
-            template = template_env.get_template('media/misc.html')
             params['title'] = misc['title']
             params['self_path'] = '/' + misc['url_id']
             misc['pretty_date'] = pretty_format(misc['date'])
             open_graph = {
                 'description': misc['summary'],
-                'image': params['protocol'] + params['hostname'] + params['hostname_suffix'] + '/assets/' + misc['logo'][-1],
+                'image': asset_base + misc['logo'][-1],
                 'image:alt': misc['title'] + ' logo'
             }
-            output = template.render(proj=misc, open_graph=open_graph, **params)
+            add_item_page(template, misc['url_id'] + '.html', params, proj=misc, open_graph=open_graph)
             sort_into_structure(params['title'], params['current_site'] + '/misc/' + misc['url_id'], misc['url_id'], weight, params['structure'])
             weight += 1
-            add_to_build(output, misc['url_id'] + '.html', params)
 
         template = template_env.get_template('media/index.html')
         params['title'] = 'Media'
@@ -807,59 +1282,78 @@ def compile_site(site, params):
     tint = tint[1:]
     if len(tint) == 3:
         tint = ''.join([2*c for c in tint])
-    red = int(tint[0:2], 16)
-    green = int(tint[2:4], 16)
-    blue = int(tint[4:6], 16)
+    red, green, blue = bytes.fromhex(tint)
     favicon_cache_dir = os.path.join(params['data_root'], 'cache', 'favicon')
     if not os.path.isdir(favicon_cache_dir):
         os.makedirs(favicon_cache_dir)
-    favicon_cache = os.path.join(favicon_cache_dir, site['name'] + '-original.png')
+    # Cache file names include the accent color, so a changed tint for one
+    # site regenerates only that site's images instead of reusing stale art.
+    cache_stem = site['name'] + '-' + tint
+    favicon_cache = os.path.join(favicon_cache_dir, cache_stem + '-original.png')
     if not os.path.isfile(favicon_cache):
         favicon_large = PIL.Image.open(os.path.join(params['data_root'], 'templates', 'favicon.png'))
-        favicon_large = PIL.ImageChops.multiply(favicon_large, PIL.Image.new('RGBA', favicon_large.size, (red, green, blue)))
+        favicon_large = tint_image(favicon_large, (red, green, blue))
         favicon_large.save(favicon_cache)
     else:
         favicon_large = PIL.Image.open(favicon_cache)
-    favicon_ico_cache = os.path.join(favicon_cache_dir, site['name'] + '.ico')
+    # Decode the large favicon once up front; Pillow would otherwise decode
+    # lazily, and the resize jobs share the image across threads.
+    favicon_large.load()
+    favicon_ico_cache = os.path.join(favicon_cache_dir, cache_stem + '.ico')
     if not os.path.isfile(favicon_ico_cache):
         interim = favicon_cache[:-4]+'-precrush.png'
         favicon = favicon_large.resize((32, 32), resample=PIL.Image.LANCZOS)
         favicon.save(favicon_ico_cache, sizes=[(16, 16), (24, 24), (32, 32)])
     add_to_build(favicon_ico_cache, 'favicon.ico', params)
+    executor = get_tool_executor()
+    favicon_jobs = []
     for size in [32, 128, 152, 167, 180, 192, 196, 600]:
-        favicon_cache = os.path.join(favicon_cache_dir, site['name'] + '-' + str(size) + '.png')
+        favicon_cache = os.path.join(favicon_cache_dir, cache_stem + '-' + str(size) + '.png')
+        future = None
         if not os.path.isfile(favicon_cache):
-            interim = favicon_cache[:-4]+'-precrush.png'
-            favicon = favicon_large.resize((size, size), resample=PIL.Image.LANCZOS)
-            favicon.save(favicon_cache[:-4]+'-precrush.png')
-            subprocess.run(['pngcrush', interim, favicon_cache])
-            os.remove(interim)
+            future = executor.submit(favicon_size_job, favicon_large, size, favicon_cache)
+        favicon_jobs.append((size, favicon_cache, future))
+    for size, favicon_cache, future in favicon_jobs:
+        if future is not None:
+            future.result()
         add_to_build(favicon_cache, os.path.join('assets', 'favicon-' + str(size) + '.png'), params)
     illustrations_cache_dir = os.path.join(params['data_root'], 'cache', 'illustrations')
     if not os.path.isdir(illustrations_cache_dir):
         os.makedirs(illustrations_cache_dir)
-    error_404_full = os.path.join(illustrations_cache_dir, 'error-404-' + site['name'] + '-full.png')
+    error_404_full = os.path.join(illustrations_cache_dir, 'error-404-' + cache_stem + '-full.png')
     if not os.path.isfile(error_404_full):
         error_404_base = PIL.Image.open(os.path.join(params['data_root'], 'templates', 'error_404_base.png'))
         error_404_overlay = PIL.Image.open(os.path.join(params['data_root'], 'templates', 'error_404_overlay.png'))
-        error_404_overlay = PIL.ImageChops.multiply(error_404_overlay, PIL.Image.new('RGBA', error_404_overlay.size, (red, green, blue)))
+        error_404_overlay = tint_image(error_404_overlay, (red, green, blue))
         error_404_illustration = PIL.Image.alpha_composite(error_404_base, error_404_overlay)
         error_404_illustration.save(error_404_full)
-    error_404_optimized = os.path.join(illustrations_cache_dir, 'error-404-' + site['name'] + '-optimized.')
+    error_404_optimized = os.path.join(illustrations_cache_dir, 'error-404-' + cache_stem + '-optimized.')
+    # The PNG and WebP encodes both read error_404_full and nothing else,
+    # so they run concurrently.
+    png_future = None
     if not os.path.isfile(error_404_optimized + 'png'):
-        subprocess.run(['convert', error_404_full, '+dither', '-colors', '256', '-alpha', 'background', 'PNG8:' + error_404_optimized + 'interim.png'])
-        subprocess.run(['pngcrush', error_404_optimized + 'interim.png', error_404_optimized + 'png'])
-        os.remove(error_404_optimized + 'interim.png')
-    add_to_build(error_404_optimized + 'png', os.path.join('assets', 'error_404.png'), params)
+        png_future = executor.submit(error_404_png_job, error_404_full, error_404_optimized + 'png')
+    webp_future = None
     if not os.path.isfile(error_404_optimized + 'webp'):
-        subprocess.run(['cwebp', '-preset', 'drawing', '-q', '55', '-m', '6', error_404_full, '-o', error_404_optimized + 'webp'])
+        webp_future = executor.submit(subprocess.run, ['cwebp', '-preset', 'drawing', '-q', '55', '-m', '6', error_404_full, '-o', error_404_optimized + 'webp'])
+    if png_future is not None:
+        png_future.result()
+    add_to_build(error_404_optimized + 'png', os.path.join('assets', 'error_404.png'), params)
+    if webp_future is not None:
+        webp_future.result()
     add_to_build(error_404_optimized + 'webp', os.path.join('assets', 'error_404.webp'), params)
 
 
-def get_sitemap_entries(structure, base_url):
-    entries = []
-    for id in structure:
-        item = structure[id]
+# Fixed shell for the machine-readable sitemap; the schema leaves no
+# room for per-site variation, so no template pass is needed.
+_sitemap_xml_head = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+_sitemap_xml_tail = '</urlset>\n'
+
+
+def get_sitemap_entries(structure, base_url, _entries=None):
+    if _entries is None:
+        _entries = set()
+    for item in structure.values():
         path = item['path']
         if '#' in path:
             path = path[:path.index('#')]
@@ -868,17 +1362,55 @@ def get_sitemap_entries(structure, base_url):
             continue
         if ':' not in path:
             path = base_url + path
-        if path not in entries:
-            entries.append(path)
+        _entries.add(path)
         if 'children' in item:
-            for child_entry in get_sitemap_entries(item['children'], base_url):
-                if child_entry not in entries:
-                    entries.append(child_entry)
-    return entries
+            get_sitemap_entries(item['children'], base_url, _entries)
+    return _entries
+
+def sync_build(build_dir, target_root):
+    """Mirror the build directory into target_root.
+
+    Files are compared by size and mtime the way rsync --times would, and
+    changed files are hardlinked where possible so that a deploy on the
+    same filesystem moves no file data at all. Symlinked build files are
+    dereferenced, and extraneous files and empty directories in
+    target_root are removed."""
+    wanted = set()
+    for dirpath, dirnames, filenames in os.walk(build_dir):
+        relative_dir = os.path.relpath(dirpath, build_dir)
+        for filename in filenames:
+            source = os.path.join(dirpath, filename)
+            relative = os.path.normpath(os.path.join(relative_dir, filename))
+            wanted.add(relative)
+            target = os.path.join(target_root, relative)
+            source_stat = os.stat(source)
+            try:
+                target_stat = os.stat(target)
+                if source_stat.st_mtime == target_stat.st_mtime and source_stat.st_size == target_stat.st_size:
+                    continue
+                os.remove(target)
+            except OSError:
+                target_dir = os.path.dirname(target)
+                if not os.path.isdir(target_dir):
+                    os.makedirs(target_dir)
+            log('Deploying {} ...'.format(relative))
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copy2(source, target)
+    for dirpath, dirnames, filenames in os.walk(target_root, topdown=False):
+        relative_dir = os.path.relpath(dirpath, target_root)
+        for filename in filenames:
+            relative = os.path.normpath(os.path.join(relative_dir, filename))
+            if relative not in wanted:
+                os.remove(os.path.join(dirpath, filename))
+        if dirpath != target_root and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+
 
 def main(argv):
 
-    params = json.loads(fread('params.json'))
+    params = load_json('params.json')
     params['current_year'] = datetime.datetime.utcnow().year
     params['rfc_2822_now'] = rfc_2822_format(datetime.datetime.utcnow())
     structure = {}
@@ -901,14 +1433,26 @@ def main(argv):
         params.update(params['env'][build_target])
         del params['env']
 
-        templates_path = os.path.join(params['data_root'], 'templates')
-        template_env = jinja2.Environment(loader=jinja2.FileSystemLoader(templates_path))
+        # The manifest remembers what was last written to the build
+        # directory, keyed by target path, so unchanged outputs can be
+        # skipped without reading them back.
+        manifest_path = os.path.join(build_path, build_target + '.manifest.json')
+        if os.path.isfile(manifest_path):
+            manifest = load_json(manifest_path)
+        else:
+            manifest = {}
+        params['manifest'] = manifest
+
+        template_env = make_template_env(params['data_root'])
 
         weight = 1
         for site in params['sites']:
-            site_params = copy.deepcopy(params)
+            # compile_site only ever reassigns top-level keys, so a shallow
+            # copy is enough to isolate the per-site parameters.
+            site_params = dict(params)
             del site_params['target_root']
             site_params['structure'] = structure
+            site_params['manifest'] = manifest
             site_params['site_dir'] = site['name'].lower()
             site_params['title'] = site['name']
             site_params['current_site'] = site['name']
@@ -920,35 +1464,42 @@ def main(argv):
             sort_into_structure(structure_title, site_params['current_site'], params['protocol']+site_params['hostname']+site_params['hostname_suffix'], weight, structure)
             sort_into_structure('Sitemap', site_params['current_site'] + '/sitemap', 'sitemap', 999, structure)
             compile_site(site, site_params)
-            template = template_env.get_template('sitemap.xml')
-            entries = get_sitemap_entries({ site['name']: structure[site['name']] }, params['protocol']+site['hostname']+params['hostname_suffix']+'/')
-            entries.sort()
-            output = template.render(entries=entries)
-            add_to_build(output, 'sitemap.xml', site_params)
+            entries = sorted(get_sitemap_entries({ site['name']: structure[site['name']] }, params['protocol']+site['hostname']+params['hostname_suffix']+'/'))
+            urls = ''.join('<url><loc>' + html.escape(entry) + '</loc></url>\n' for entry in entries)
+            add_to_build(_sitemap_xml_head + urls + _sitemap_xml_tail, 'sitemap.xml', site_params)
             weight += 1
 
         cleanup_structure(structure, collate_common=True)
 
+        # The human-readable sitemap can only render once the structure is
+        # complete, so it stays a separate pass, but a deliberately light
+        # one: a single template, shared context and shallow params.
+        template = template_env.get_template('sitemap.html')
+        open_graph = {
+            'description': 'This is a human-readable complete sitemap for this website.'
+        }
         for site in params['sites']:
-            site_params = copy.deepcopy(params)
+            site_params = dict(params)
             del site_params['target_root']
             site_params['structure'] = structure
+            site_params['manifest'] = manifest
             site_params['site_dir'] = site['name'].lower()
             site_params['title'] = 'Sitemap'
+            site_params['self_path'] = '/sitemap'
             site_params['current_site'] = site['name']
             site_params['hostname'] = site['hostname']
             site_params['accent_color'] = site['accent_color']
-            template = template_env.get_template('sitemap.html')
-            params['title'] = 'Sitemap'
-            params['self_path'] = '/sitemap'
-            open_graph = {
-                'description': 'This is a human-readable complete sitemap for this website.'
-            }
             output = template.render(open_graph=open_graph, **site_params)
             add_to_build(output, 'sitemap.html', site_params)
 
-        cmd = ['rsync', '--progress', '--recursive', '--copy-links', '--safe-links', '--times', '--perms', '--delete', os.path.join(build_path, params['build_target']) + '/', params['target_root'] + '/']
-        subprocess.run(cmd)
+        finish_build_jobs()
+        fwrite(manifest_path, json.dumps(manifest))
+
+        if 'full-sync' in argv:
+            cmd = ['rsync', '--progress', '--recursive', '--copy-links', '--safe-links', '--times', '--perms', '--delete', os.path.join(build_path, params['build_target']) + '/', params['target_root'] + '/']
+            subprocess.run(cmd)
+        else:
+            sync_build(os.path.join(build_path, params['build_target']), params['target_root'])
 
 # Test parameter to be set temporarily by unit tests.
 _test = None